@@ -1,14 +1,21 @@
 import os
+import logging
+import sys
 import json
+import bisect
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import queue
+from functools import partial
 
+import numpy as np
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 from uart import (
     init_uart,
+    close_uart,
     uart_send_set_params,
     uart_send_recv_only,
     stream_egram,
@@ -17,13 +24,18 @@ from uart import (
 
 from storage import (
     ensure_files,
+    make_pw_record,
+    check_pw,
     load_users,
+    load_user_index,
     save_users,
     load_user_params,
     save_user_params,
     load_param_config
 )
 
+log = logging.getLogger(__name__)
+
 MODE_MAP = {
     "AOO": 0x3,
     "VOO": 0x1,
@@ -52,6 +64,25 @@ HYSTERESIS_MAP = {
     "Track LRL": 1
 }
 
+# How often the Tk loop collects finished UART exchanges from the worker
+UART_POLL_MS = 50
+
+# Distance difference below which a value counts as halfway between two steps
+SNAP_TIE_EPS = 1e-9
+
+# Number of most recent egram samples kept on screen
+EGRAM_MAX_POINTS = 500
+
+# How often queued egram samples are moved into the plot while streaming
+EGRAM_POLL_MS = 40
+
+# Egram y-axis: fixed padding, extra headroom (fraction of the data span) when
+# rescaling, and how small the data may get relative to the view before the
+# axis zooms back in
+EGRAM_YPAD = 0.1
+EGRAM_YHEADROOM = 0.1
+EGRAM_YSHRINK = 0.5
+
 BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR     = os.path.join(BASE_DIR, "data")
 USERS_JSON   = os.path.join(DATA_DIR, "users.json")
@@ -59,6 +90,82 @@ PARAMS_JSON  = os.path.join(DATA_DIR, "params.json")
 USER_PARAMS_JSON = os.path.join(DATA_DIR, "user_params.json")
 
 
+def match_range(value, bounds):
+    """
+    Return the (min, max, inc) tuple from `bounds` that contains `value`, or None.
+    """
+    for b in bounds:
+        if b[0] <= value <= b[1]:
+            return b
+    return None
+
+
+def make_validator(meta):
+    """
+    Build a validator for one schema field. It maps the raw entry text to
+    (value, bounds, error): `bounds` is the matched (min, max, inc) range for
+    numeric fields, and `error` is a message string or None.
+    """
+    label = meta["label"]
+
+    if "allowed" in meta:
+        allowed = meta["allowed"]
+
+        def validate(raw):
+            if raw not in allowed:
+                return None, None, f"{label}: '{raw}' not a valid option"
+            return raw, None, None
+
+        return validate
+
+    ty = meta["type"]
+    bounds = meta["bounds"]
+    unit = meta.get("unit", "")
+    type_err = f"{label}: not a valid {ty.__name__}"
+    range_str = " or ".join(f"[{lo}, {hi}]" for lo, hi, _ in bounds)
+
+    def validate(raw):
+        try:
+            val = ty(raw)
+        except ValueError:
+            return None, None, type_err
+        b = match_range(val, bounds)
+        if b is None:
+            return None, None, f"{label}: {val} {unit} out of valid ranges {range_str}"
+        return val, b, None
+
+    return validate
+
+
+def snap_to_allowed(value, allowed):
+    """
+    Return the entry of the sorted sequence `allowed` nearest to `value`.
+    Ties (to within float error, e.g. 0.65 between 0.6 and 0.7) go to the
+    lower one.
+    """
+    i = bisect.bisect_left(allowed, value)
+    if i == 0:
+        return allowed[0]
+    if i == len(allowed):
+        return allowed[-1]
+    below, above = allowed[i - 1], allowed[i]
+    return below if (value - below) - (above - value) <= SNAP_TIE_EPS else above
+
+
+def egram_ylim(current, lo, hi):
+    """
+    Return the y-limits for egram data spanning [lo, hi]. The current limits
+    are kept while the data fits inside them and still fills a reasonable
+    share of the view, so the axes (and blit background) rarely change.
+    """
+    bottom, top = current
+    span = hi - lo
+    if bottom <= lo and hi <= top and span >= EGRAM_YSHRINK * (top - bottom - 2 * EGRAM_YPAD):
+        return current
+    margin = EGRAM_YPAD + EGRAM_YHEADROOM * span
+    return lo - margin, hi + margin
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -69,29 +176,55 @@ class App(tk.Tk):
         self.geometry("1100x650")
         self.minsize(900, 500)
 
-        # Open UART once, share via uart.ser global
-        self.serial = init_uart("COM10", 115200)
+        # button styles shared by every view (Egram toggle)
+        style = ttk.Style(self)
+        style.configure("On.TButton", foreground="black", background="#28a745")
+        style.map("On.TButton", background=[("active", "#218838")])
+        style.configure("Off.TButton", foreground="black", background="#dd1a1a")
+        style.map("Off.TButton", background=[("active", "#dd1a1a")])
+
+        self.serial = None
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # One worker owns blocking UART exchanges; results come back through
+        # a queue that the Tk loop drains, so widgets are only touched here
+        self._uart_jobs = queue.Queue()
+        self._uart_results = queue.Queue()
+        threading.Thread(target=self._uart_worker, daemon=True).start()
+        self.after(UART_POLL_MS, self._drain_uart_results)
+
+        # Parse params.json, then open UART (shared via uart.ser global), on
+        # the worker so a slow or missing port doesn't hold up the login
+        # screen; the parse goes first so it never waits behind the open
+        self.submit_uart(load_param_config, (), self._config_loaded)
+        self.submit_uart(self._ensure_open, (), self._port_opened)
 
         self.current_user   = None
         self.device_id      = None
         self.prev_device_id = None
 
         # status bar vars
-        self.status_var = tk.StringVar(value="Comms: idle")
+        # status is split so the stable part isn't re-rendered on every update
+        self.comms_var   = tk.StringVar(value="idle")
+        self.context_var = tk.StringVar(value="")
+        self._user_ctx   = ""
         self.mode_var   = tk.StringVar(value="Mode: N/A")
 
         # top status bar
         top = ttk.Frame(self, padding=6)
         top.pack(side="top", fill="x")
-        ttk.Label(top, textvariable=self.status_var).pack(side="left", padx=8)
+        ttk.Label(top, text="Comms:").pack(side="left", padx=(8, 0))
+        ttk.Label(top, textvariable=self.comms_var).pack(side="left", padx=(4, 0))
+        ttk.Label(top, textvariable=self.context_var).pack(side="left", padx=(0, 8))
         ttk.Label(top, textvariable=self.mode_var).pack(side="left", padx=16)
 
         # container for views
         self.container = ttk.Frame(self, padding=12)
         self.container.pack(side="top", fill="both", expand=True)
 
+        # MonitorView is built on first login (see get_monitor_view)
         self.login_view   = LoginView(self.container, self)
-        self.monitor_view = MonitorView(self.container, self)
+        self.monitor_view = None
 
         self.current_view = None
         self.show_view(self.login_view)
@@ -102,6 +235,87 @@ class App(tk.Tk):
         view.pack(fill="both", expand=True)
         self.current_view = view
 
+    def submit_uart(self, fn, args, on_done):
+        """
+        Queue fn(*args) for the UART worker. on_done(err) is later called on
+        the Tk thread, with err None on success or the raised exception.
+        """
+        self._uart_jobs.put((fn, args, on_done))
+
+    def submit_exchange(self, fn, args, on_done):
+        """
+        Like submit_uart, but the worker (re)opens the port before fn runs,
+        so every open happens on the worker and never on the Tk thread.
+        """
+        self.submit_uart(self._exchange, (fn, args), on_done)
+
+    def _exchange(self, fn, args):
+        self._ensure_open()
+        try:
+            fn(*args)
+        except Exception:
+            # forget the port so the next job reopens it (e.g. after the USB
+            # adapter was unplugged); closed here so no other job is mid-write
+            close_uart()
+            self.serial = None
+            raise
+
+    def _ensure_open(self):
+        """
+        Worker only: (re)open the UART if it is closed or was never opened.
+        Raises if the port cannot be opened.
+        """
+        if self.serial is None or not self.serial.is_open:
+            self.serial = init_uart("COM10", 115200)
+
+    def _uart_worker(self):
+        while True:
+            fn, args, on_done = self._uart_jobs.get()
+            err = None
+            try:
+                fn(*args)
+            except Exception as e:
+                err = e
+            self._uart_results.put((on_done, err))
+
+    def _drain_uart_results(self):
+        while True:
+            try:
+                on_done, err = self._uart_results.get_nowait()
+            except queue.Empty:
+                break
+            on_done(err)
+        self.after(UART_POLL_MS, self._drain_uart_results)
+
+    def _port_opened(self, err):
+        if err is not None:
+            log.warning("UART open failed: %s", err)
+
+    def _config_loaded(self, err):
+        if err is not None:
+            log.warning("params.json load failed: %s", err)
+
+    def _on_close(self):
+        stop_stream()
+        close_uart()
+        self.destroy()
+
+    def get_monitor_view(self):
+        """
+        Return the MonitorView, constructing it the first time it is needed.
+        """
+        if self.monitor_view is None:
+            self.monitor_view = MonitorView(self.container, self)
+        return self.monitor_view
+
+    def set_user(self, name):
+        """
+        Record the logged-in user and cache their part of the status bar.
+        """
+        self.current_user = name
+        self._user_ctx = f"  |  user: {name}"
+        self.context_var.set(self._user_ctx)
+
     def set_mode(self, mode):
         self.mode_var.set(f"Mode: {mode}")
 
@@ -114,9 +328,8 @@ class App(tk.Tk):
         self.prev_device_id = old
         self.device_id = new_id
 
-        user_txt = f"  |  user: {self.current_user}" if self.current_user else ""
-        dev_txt  = f"  |  device: {self.device_id}" if self.device_id else ""
-        self.status_var.set(f"Comms: idle{user_txt}{dev_txt}")
+        dev_txt = f"  |  device: {new_id}" if new_id else ""
+        self.context_var.set(self._user_ctx + dev_txt)
 
         if old is None and new_id:
             self.monitor_view.show_notice(
@@ -160,14 +373,11 @@ class LoginView(ttk.Frame):
         self.pass_entry = ttk.Entry(card, width=28, show="*")
         self.pass_entry.grid(row=2, column=1, sticky="ew", padx=8, pady=6)
 
-        self.show_var = tk.BooleanVar(value=False)
+        self._pw_shown = False
         ttk.Checkbutton(
             card,
             text="Show",
-            variable=self.show_var,
-            command=lambda: self.pass_entry.config(
-                show="" if self.show_var.get() else "*"
-            ),
+            command=self._toggle_pw,
         ).grid(row=2, column=2, padx=6)
 
         actions = ttk.Frame(card)
@@ -179,13 +389,17 @@ class LoginView(ttk.Frame):
         self.user_entry.bind("<Return>", lambda e: self.on_login())
         self.pass_entry.bind("<Return>", lambda e: self.on_login())
 
+    def _toggle_pw(self):
+        self._pw_shown = not self._pw_shown
+        self.pass_entry.config(show="" if self._pw_shown else "*")
+
     def on_register(self):
         """
         Register a new user if the username is unique, inputs are valid,
         and the local user limit has not been reached.
         """
-        data = load_users()
-        users = data["users"]
+        # copied: the cached list must not gain a user the save never wrote
+        users = list(load_users()["users"])
         if len(users) >= 10:
             messagebox.showwarning("Limit", "Maximum of 10 users stored locally")
             return
@@ -196,11 +410,11 @@ class LoginView(ttk.Frame):
             messagebox.showwarning("Missing info", "Enter both username and password")
             return
 
-        if any(u["name"] == name for u in users):
+        if name in load_user_index():
             messagebox.showwarning("Exists", "That username already exists")
             return
 
-        users.append({"name": name, "pw": pw})
+        users.append({"name": name, **make_pw_record(pw)})
         save_users({"users": users})
         messagebox.showinfo("Registered", f"User '{name}' registered")
         self.pass_entry.delete(0, "end")
@@ -209,26 +423,20 @@ class LoginView(ttk.Frame):
         """
         Authenticate the user and load their saved parameters if login succeeds.
         """
-        data  = load_users()
-        users = data["users"]
+        users_by_name = load_user_index()
         name  = self.user_entry.get().strip()
         pw    = self.pass_entry.get()
 
-        match = next((u for u in users if u["name"] == name and u["pw"] == pw), None)
-        if not match:
+        user = users_by_name.get(name)
+        if user is None or not check_pw(user, pw):
             messagebox.showerror("Login failed", "Invalid username or password")
             return
 
-        self.app.current_user = name
-        self.app.status_var.set(f"Comms: idle  |  user: {name}")
-
-        user_params = load_user_params()
-        if name in user_params:
-            for k, v in user_params[name].items():
-                if k in self.app.monitor_view.vars:
-                    self.app.monitor_view.vars[k].set(str(v))
+        self.app.set_user(name)
 
-        self.app.show_view(self.app.monitor_view)
+        monitor_view = self.app.get_monitor_view()
+        monitor_view.load_saved_params(force=True)
+        self.app.show_view(monitor_view)
 
 
 class MonitorView(ttk.Frame):
@@ -248,8 +456,21 @@ class MonitorView(ttk.Frame):
 
         # Load schema/defaults/modes from params.json
         ttk.Label(right, text="Mode:").pack(side="left", padx=(0, 6), pady=8)
-        self.PARAM_SCHEMA, self.defaults, self.modes = load_param_config()
+        (
+            self.PARAM_SCHEMA,
+            self.defaults,
+            self.modes,
+            self.modes_index,
+        ) = load_param_config()
         self.PARAM_ORDER = list(self.PARAM_SCHEMA.keys())
+        self._validators = {
+            k: make_validator(meta)
+            for k, meta in self.PARAM_SCHEMA.items()
+            if "allowed" in meta or "ranges" in meta
+        }
+        self._last_parsed = {}   # key -> (raw, value, bounds) of last valid parse
+        self._last_clean = None  # (entry texts, clean) of last error-free pass
+        self._mode_keys = {m: frozenset(keys) for m, keys in self.modes_index.items()}
 
         self.mode_cb = ttk.Combobox(
             right,
@@ -287,70 +508,20 @@ class MonitorView(ttk.Frame):
 
         # param vars
         self.vars = {k: tk.StringVar(value=str(self.defaults[k])) for k in self.PARAM_SCHEMA}
+        self._loaded_for = None   # (user, mode) currently shown in the fields
+        self.sliders = {}
         self.entries = {}
         self.rows = {}
 
         params = ttk.LabelFrame(body, text="Programmable Parameters", padding=12)
         params.pack(side="left", fill="y", padx=(0, 8))
 
-        row_index = 0
-        for field_key, field_meta in self.PARAM_SCHEMA.items():
-            unit = field_meta.get("unit", "")
-            label_text = f"{field_meta['label']}" + (f" ({unit})" if unit else "") + ":"
-            label_widget = ttk.Label(params, text=label_text)
-            label_widget.grid(row=row_index, column=0, sticky="e", padx=6, pady=4)
-
-            var = self.vars[field_key]
-
-            input_widget = None
-            slider_widget = None
-
-            if "allowed" in field_meta:
-                input_widget = ttk.Combobox(
-                    params,
-                    values=field_meta["allowed"],
-                    textvariable=var,
-                    state="readonly",
-                    width=12,
-                )
-                input_widget.grid(row=row_index, column=1, sticky="w", padx=6, pady=4)
-
-            elif "ranges" in field_meta:
-                input_widget = ttk.Entry(params, textvariable=var, width=10)
-                input_widget.grid(row=row_index, column=1, sticky="w", padx=6, pady=4)
-
-                allowed_vals = []
-                for r in field_meta["ranges"]:
-                    v = r["min"]
-                    while v <= r["max"]:
-                        allowed_vals.append(v)
-                        v = round(v + r["inc"], 5)
-
-                allowed_vals = sorted(set(allowed_vals))
-                field_meta["allowed_vals"] = allowed_vals
-
-                slider_widget = tk.Scale(
-                    params,
-                    label="",
-                    showvalue=0,
-                    from_=0,
-                    to=len(allowed_vals) - 1,
-                    orient="horizontal",
-                    length=160,
-                    resolution=1,
-                    command=lambda idx, k=field_key: self._slider_changed(k, idx),
-                )
-                slider_widget.grid(row=row_index, column=2, padx=6, pady=4)
-
-                var.trace_add(
-                    "write",
-                    lambda *_,
-                    k=field_key,
-                    sl=slider_widget: self._entry_changed(k, sl),
-                )
-
-            self.rows[field_key] = (label_widget, input_widget, slider_widget)
-            row_index += 1
+        # rows are built on first use by _ensure_row; until then only the
+        # grid row they will occupy is recorded
+        self._params_frame = params
+        self._row_index = {k: i for i, k in enumerate(self.PARAM_SCHEMA)}
+        row_index = len(self._row_index)
+        self._visible_keys = set()
 
         # Buttons row
         buttons_row_frame = ttk.Frame(params)
@@ -372,12 +543,6 @@ class MonitorView(ttk.Frame):
 
         self.egram_enabled = tk.BooleanVar(value=False)
 
-        style = ttk.Style()
-        style.configure("On.TButton", foreground="black", background="#28a745")
-        style.map("On.TButton", background=[("active", "#218838")])
-        style.configure("Off.TButton", foreground="black", background="#dd1a1a")
-        style.map("Off.TButton", background=[("active", "#dd1a1a")])
-
         self.egram_btn = ttk.Button(
             buttons_row_frame,
             text="Egram: OFF",
@@ -407,17 +572,27 @@ class MonitorView(ttk.Frame):
         self.ax_vent.set_ylabel("Amplitude")
         self.ax_vent.grid(True)
 
-        self.line_atr, = self.ax_atr.plot([], [], lw=1)
-        self.line_vent, = self.ax_vent.plot([], [], lw=1)
+        # animated: left out of full redraws and blitted over a cached background
+        self.line_atr, = self.ax_atr.plot([], [], lw=1, animated=True)
+        self.line_vent, = self.ax_vent.plot([], [], lw=1, animated=True)
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=right_panel)
         self.canvas_widget = self.canvas.get_tk_widget()
         self.canvas_widget.pack(fill="both", expand=True)
-
-        self.atr_values = []
-        self.vent_values = []
-        self._sample_counter = 0
-        self._egram_thread = None
+        self._egram_bg = None
+        self.canvas.mpl_connect("draw_event", self._on_canvas_draw)
+
+        # ring buffer of the latest samples: row 0 atrium, row 1 ventricle;
+        # _egram_pos is the next slot to write, _egram_len how many are filled
+        self._egram_buf = np.empty((2, EGRAM_MAX_POINTS))
+        self._egram_x = np.arange(EGRAM_MAX_POINTS)
+        self._egram_pos = 0
+        self._egram_len = 0
+        # the stream thread only enqueues; the Tk loop drains on a timer
+        self._egram_queue = queue.SimpleQueue()
+        self._egram_job = None
+        self._egram_on = False   # plain flag the UART worker can read
+        self._uart_busy = False
 
         self.mode_cb.set(self.default_mode)
         self.on_mode_change()
@@ -447,29 +622,115 @@ class MonitorView(ttk.Frame):
         mode = self.mode_cb.get()
         self.app.set_mode(mode)
 
-        for key, meta in self.PARAM_SCHEMA.items():
-            widgets = self.rows[key]
-            allowed_modes = meta.get("modes", [])
-
-            if mode in allowed_modes:
-                for w in widgets:
-                    if w is not None:
-                        w.grid()
-            else:
-                for w in widgets:
-                    if w is not None:
-                        w.grid_remove()
+        # only touch rows whose visibility differs from the previous mode
+        target = self._mode_keys.get(mode, set())
+        for key in self._visible_keys - target:
+            for w in self.rows[key]:
+                if w is not None:
+                    w.grid_remove()
+        for key in target - self._visible_keys:
+            for w in self._ensure_row(key):
+                if w is not None:
+                    w.grid()
+        self._visible_keys = target
+
+        self.load_saved_params()
+
+    def load_saved_params(self, force=False):
+        """
+        Fill the fields for the current user and mode from their saved
+        parameters, or from the defaults if nothing is saved for that mode.
+        Does nothing if that (user, mode) is already loaded, unless `force`.
+        """
+        mode = self.mode_cb.get()
+        loaded_for = (self.app.current_user, mode)
+        if not force and loaded_for == self._loaded_for:
+            return
+        self._loaded_for = loaded_for
 
-        saved = load_user_params().get(self.app.current_user, {}).get(mode)
+        saved = load_user_params(self.app.current_user).get(mode)
         if saved:
-            for k, v in saved.items():
-                if k in self.vars:
-                    self.vars[k].set(str(v))
+            values = {k: v for k, v in saved.items() if k in self.vars}
         else:
-            for k, v in self.defaults.items():
-                meta = self.PARAM_SCHEMA[k]
-                if mode in meta.get("modes", []):
-                    self.vars[k].set(str(v))
+            keys = self._mode_keys.get(mode, set())
+            values = {k: v for k, v in self.defaults.items() if k in keys}
+        self._apply_params(values)
+
+    def _apply_params(self, values):
+        """
+        Write a batch of parameter values into their entry variables,
+        skipping ones that already hold the value, and move each changed
+        slider to match.
+        """
+        for k, v in values.items():
+            var, new = self.vars[k], str(v)
+            if var.get() != new:
+                var.set(new)
+                if k in self.sliders:
+                    self._entry_committed(k)
+
+    def _ensure_row(self, field_key):
+        """
+        Return the (label, input, slider) widgets for `field_key`, creating
+        and gridding them the first time the field is shown.
+        """
+        row = self.rows.get(field_key)
+        if row is not None:
+            return row
+
+        field_meta = self.PARAM_SCHEMA[field_key]
+        params = self._params_frame
+        row_index = self._row_index[field_key]
+
+        unit = field_meta.get("unit", "")
+        label_text = f"{field_meta['label']}" + (f" ({unit})" if unit else "") + ":"
+        label_widget = ttk.Label(params, text=label_text)
+        label_widget.grid(row=row_index, column=0, sticky="e", padx=6, pady=4)
+
+        var = self.vars[field_key]
+
+        input_widget = None
+        slider_widget = None
+
+        if "allowed" in field_meta:
+            input_widget = ttk.Combobox(
+                params,
+                values=field_meta["allowed"],
+                textvariable=var,
+                state="readonly",
+                width=12,
+            )
+            input_widget.grid(row=row_index, column=1, sticky="w", padx=6, pady=4)
+
+        elif "ranges" in field_meta:
+            input_widget = ttk.Entry(params, textvariable=var, width=10)
+            input_widget.grid(row=row_index, column=1, sticky="w", padx=6, pady=4)
+
+            allowed_vals = field_meta["allowed_vals"]
+
+            slider_widget = tk.Scale(
+                params,
+                label="",
+                showvalue=0,
+                from_=0,
+                to=len(allowed_vals) - 1,
+                orient="horizontal",
+                length=160,
+                resolution=1,
+                command=partial(self._slider_changed, field_key),
+            )
+            slider_widget.grid(row=row_index, column=2, padx=6, pady=4)
+
+            self.sliders[field_key] = slider_widget
+            # sync the slider once per committed edit, not per keystroke
+            commit = partial(self._on_entry_commit, field_key)
+            input_widget.bind("<FocusOut>", commit)
+            input_widget.bind("<Return>", commit)
+
+        row = self.rows[field_key] = (label_widget, input_widget, slider_widget)
+        if slider_widget is not None:
+            self._entry_committed(field_key)   # start the slider at the shown value
+        return row
 
     def _slider_changed(self, key, idx):
         """
@@ -485,29 +746,24 @@ class MonitorView(ttk.Frame):
         idx = max(0, min(idx, len(allowed) - 1))
         self.vars[key].set(str(allowed[idx]))
 
-    def _entry_changed(self, key, slider):
+    def _on_entry_commit(self, key, event):
+        self._entry_committed(key)
+
+    def _entry_committed(self, key):
         """
-        Validate entry input and update the linked slider if the value is allowed.
+        Move the slider to the entry's value once an edit is committed
+        (focus leaves the entry or Return is pressed), if the value is allowed.
         """
-        raw = self.vars[key].get()
-        if raw == "" or raw.endswith(".") or raw.startswith("."):
-            return
         try:
-            v = float(raw)
+            v = float(self.vars[key].get())
         except ValueError:
             return
 
-        meta = self.PARAM_SCHEMA[key]
-        allowed = meta.get("allowed_vals")
-        if not allowed:
-            return
-
-        allowed_strs = [str(a) for a in allowed]
-        if raw not in allowed_strs:
+        idx = self.PARAM_SCHEMA[key]["allowed_index"].get(v)
+        if idx is None:
             return
 
-        idx = allowed_strs.index(raw)
-        slider.set(idx)
+        self.sliders[key].set(idx)
 
     # ------------------------------------------------------------------
     # Validation
@@ -519,74 +775,41 @@ class MonitorView(ttk.Frame):
         and a list of any validation errors.
         """
         clean, errors = {}, []
-
-        def value_in_ranges(value, ranges):
-            for r in ranges:
-                if r["min"] <= value <= r["max"]:
-                    return True
-            return False
-
-        def snap(value, inc):
-            """
-        Round `value` to the nearest multiple of `inc`, preserving decimal precision.
-        """
-            snapped = round(value / inc) * inc
-            if isinstance(inc, float):
-                decimals = len(str(inc).split(".")[1])
-                return round(snapped, decimals)
-            return int(snapped)
-
-        def find_range(value, ranges):
-            for r in ranges:
-                if r["min"] <= value <= r["max"]:
-                    return r
-            return None
-
-        # First pass: type and range checks
-        for key, meta in self.PARAM_SCHEMA.items():
-            raw = self.vars[key].get().strip()
-
-            if "ranges" in meta:
-                ty = meta["type"]
-                try:
-                    val = ty(raw)
-                except ValueError:
-                    errors.append(f"{meta['label']}: not a valid {ty.__name__}")
-                    continue
-
-                if not value_in_ranges(val, meta["ranges"]):
-                    range_str = " or ".join(
-                        f"[{r['min']}, {r['max']}]" for r in meta["ranges"]
-                    )
-                    errors.append(
-                        f"{meta['label']}: {val} {meta.get('unit','')} out of valid ranges {range_str}"
-                    )
+        ranged = []
+        # read every entry across the Tcl bridge once, then work in Python
+        snapshot = {k: self.vars[k].get().strip() for k in self._validators}
+
+        # Save then Send on untouched fields: hand back the previous result
+        shown = tuple(snapshot.values())
+        if self._last_clean is not None and self._last_clean[0] == shown:
+            return self._last_clean[1], []
+
+        # First pass: type and range checks, reusing the last result for
+        # fields whose text has not changed since the previous call
+        for key, validate in self._validators.items():
+            raw = snapshot[key]
+            last = self._last_parsed.get(key)
+            if last is not None and last[0] == raw:
+                _, val, bounds = last
+            else:
+                val, bounds, err = validate(raw)
+                if err is not None:
+                    errors.append(err)
                     continue
+                self._last_parsed[key] = (raw, val, bounds)
 
-                clean[key] = val
-
-            if "allowed" in meta:
-                if raw not in meta["allowed"]:
-                    errors.append(f"{meta['label']}: '{raw}' not a valid option")
-                else:
-                    clean[key] = raw
+            clean[key] = val
+            if bounds is not None:
+                ranged.append(key)
 
         if errors:
             return clean, errors
 
-        # Snap to increments
-        for key, meta in self.PARAM_SCHEMA.items():
-            if key not in clean:
-                continue
-
-            val = clean[key]
-            if "ranges" in meta:
-                r = find_range(val, meta["ranges"])
-                if r is not None:
-                    snapped = snap(val, r["inc"])
-                    snapped = max(r["min"], min(snapped, r["max"]))
-                    clean[key] = snapped
-                    self.vars[key].set(str(snapped))
+        # Snap to the nearest value the field's slider can take
+        for key in ranged:
+            snapped = snap_to_allowed(clean[key], self.PARAM_SCHEMA[key]["allowed_vals"])
+            clean[key] = snapped
+            snapshot[key] = self._set_if_changed(key, snapshot[key], snapped)
 
         # LRL vs URL check (keys from JSON)
         if "LRL_ppm" in clean and "URL_ppm" in clean:
@@ -616,7 +839,7 @@ class MonitorView(ttk.Frame):
                 if v > max_v:
                     v = max_v
                 clean[k] = v
-                self.vars[k].set(str(v))
+                snapshot[k] = self._set_if_changed(k, snapshot.get(k), v)
 
         # Timing sanity checks so Pulse_Period - VRP - PW and
         # Pulse_Period - ARP - PW stay positive
@@ -644,8 +867,25 @@ class MonitorView(ttk.Frame):
                             "Atrial: ARP + Atrial Pulse Width must be less than 60000 / LRL."
                         )
 
+        if not errors:
+            # keyed on the text left in the entries after snapping/clamping
+            shown = tuple(snapshot[k] for k in self._validators)
+            self._last_clean = (shown, clean)
         return clean, errors
 
+    def _set_if_changed(self, key, shown, value):
+        """
+        Write `value` back to the entry for `key` (and its slider) unless
+        `shown` (its current text) already matches. Returns the text now in
+        the entry.
+        """
+        new = str(value)
+        if new != shown:
+            self.vars[key].set(new)
+            if key in self.sliders:
+                self._entry_committed(key)
+        return new
+
     # ------------------------------------------------------------------
     # Buttons: Save / Reset / Logout
     # ------------------------------------------------------------------
@@ -658,35 +898,28 @@ class MonitorView(ttk.Frame):
             messagebox.showerror("Invalid parameter(s)", "\n".join(errors))
             return
 
-        param_config = load_user_params()
         username = self.app.current_user
         mode = self.mode_cb.get()
+        # copied: the cached dict must not hold values the save never wrote
+        param_config = dict(load_user_params(username))
 
-        if username not in param_config:
-            param_config[username] = {}
-
-        filtered = {}
-        for key, meta in self.PARAM_SCHEMA.items():
-            if mode in meta.get("modes", []):
-                filtered[key] = clean[key]
+        filtered = {key: clean[key] for key in self.modes_index.get(mode, ())}
 
-        param_config[username][mode] = filtered
-        save_user_params(param_config)
+        param_config[mode] = filtered
+        save_user_params(username, param_config)
 
-        self.app.status_var.set(
-            f"Comms: idle  |  parameters saved for {username} ({mode})"
-        )
+        self.app.context_var.set(f"  |  parameters saved for {username} ({mode})")
 
     def on_reset(self):
         """ 
         Sets the parameters to the nominal values
         """
-        for k, v in self.defaults.items():
-            self.vars[k].set(str(v))
-        self.app.status_var.set("Comms: idle  |  defaults restored")
+        self._apply_params(self.defaults)
+        self._loaded_for = None
+        self.app.context_var.set("  |  defaults restored")
 
     def on_logout(self):
-        self.app.status_var.set("Comms: idle")
+        self.app.context_var.set("")
         self.app.show_view(self.app.login_view)
 
     # ------------------------------------------------------------------
@@ -703,10 +936,6 @@ class MonitorView(ttk.Frame):
         """
         Validate parameters and send them to the connected device via UART.
         """
-        if self.app.serial is None:
-            print("Not connected to device.")
-            return
-
         clean, errors = self._parse_and_validate()
         if errors:
             messagebox.showerror("Invalid parameter(s)", "\n".join(errors))
@@ -719,25 +948,48 @@ class MonitorView(ttk.Frame):
 
         mode_code = MODE_MAP.get(mode_name, 1)
 
-        try:
-            uart_send_set_params(clean, mode_code)
-            print("Sent SET PARAMS frame with GUI values.")
-        except Exception as e:
-            print(f"Send failed: {e}")
+        self._run_uart(
+            uart_send_set_params,
+            (clean, mode_code),
+            "Sent SET PARAMS frame with GUI values.",
+            "Send failed",
+        )
 
     def on_receive(self):
         """
         Send a RECV_ONLY frame to the device to request parameter and egram data.
         """
-        if self.app.serial is None:
-            print("Not connected to device.")
-            return
+        self._run_uart(
+            uart_send_recv_only,
+            (),
+            "Sent RECV ONLY frame.",
+            "Receive command failed",
+        )
 
-        try:
-            uart_send_recv_only()
-            print("Sent RECV ONLY frame.")
-        except Exception as e:
-            print(f"Receive command failed: {e}")
+    def _run_uart(self, fn, args, done_msg, fail_msg):
+        """
+        Hand a blocking UART exchange to the App's UART worker so the UI keeps
+        painting. Send/Receive stay disabled until it finishes; clicks made
+        while an exchange is in flight are dropped.
+        """
+        if self._uart_busy:
+            return
+        self._uart_busy = True
+        self.app.comms_var.set("busy")
+        self.send_btn.config(state="disabled")
+        self.receive_btn.config(state="disabled")
+        self.app.submit_exchange(fn, args, partial(self._uart_done, done_msg, fail_msg))
+
+    def _uart_done(self, done_msg, fail_msg, err):
+        self._uart_busy = False
+        self.app.comms_var.set("idle")
+        if not self.egram_enabled.get():
+            self.send_btn.config(state="normal")
+            self.receive_btn.config(state="normal")
+        if err is None:
+            log.info("%s", done_msg)
+        else:
+            log.warning("%s: %s", fail_msg, err)
 
     # ------------------------------------------------------------------
     # Egram streaming + plotting
@@ -750,6 +1002,8 @@ class MonitorView(ttk.Frame):
         state = self.egram_enabled.get()
         if not state:
             # turning ON
+            if self._uart_busy:
+                return
             clean, errors = self._parse_and_validate()
             if errors:
                 messagebox.showerror("Invalid parameter(s)", "\n".join(errors))
@@ -769,66 +1023,120 @@ class MonitorView(ttk.Frame):
             self.send_btn.config(state="disabled")
             self.receive_btn.config(state="disabled")
 
-            self.atr_values = []
-            self.vent_values = []
-            self._sample_counter = 0
+            self._egram_pos = 0
+            self._egram_len = 0
+            self._egram_queue = queue.SimpleQueue()
+            self._egram_job = self.after(EGRAM_POLL_MS, self._drain_egram)
 
-            def run_stream():
-                try:
-                    stream_egram(self._on_new_egram_sample, clean, mode_code)
-                except Exception as e:
-                    print(f"Egram stream error: {e}")
-
-            self._egram_thread = threading.Thread(
-                target=run_stream,
-                daemon=True,
+            # the stream runs on the UART worker, which also owns the port;
+            # stop_stream() ends it and frees the worker
+            self._egram_on = True
+            self.app.submit_exchange(
+                self._run_egram, (clean, mode_code), self._egram_done
             )
-            self._egram_thread.start()
         else:
             # turning OFF
             self.egram_enabled.set(False)
             self.egram_btn.config(text="Egram: OFF", style="Off.TButton")
+            self._egram_on = False
             stop_stream()
+            if self._egram_job is not None:
+                self.after_cancel(self._egram_job)
+                self._egram_job = None
             self.send_btn.config(state="normal")
             self.receive_btn.config(state="normal")
 
+    def _run_egram(self, clean, mode_code):
+        # switched off again while this job was still queued
+        if self._egram_on:
+            stream_egram(self._on_new_egram_sample, clean, mode_code)
+
+    def _egram_done(self, err):
+        if err is not None:
+            log.warning("Egram stream error: %s", err)
+
     def _on_new_egram_sample(self, atr, vent, params_echo, idx):
         """
-        Handle a new egram sample by storing atrial and ventricular values
-        and periodically updating the egram plot in the UI.
+        Stream-thread callback: queue the sample for the Tk loop to pick up.
         """
-        self.atr_values.append(atr)
-        self.vent_values.append(vent)
-
-        if len(self.atr_values) > 500:
-            self.atr_values = self.atr_values[-500:]
-            self.vent_values = self.vent_values[-500:]
+        self._egram_queue.put((atr, vent))
 
-        self._sample_counter += 1
-
-        if self._sample_counter % 2 == 0:
-            self.after(0, self._update_egram_plot)
+    def _drain_egram(self):
+        """
+        Move every queued egram sample into the ring buffer, redraw once if
+        anything arrived, and reschedule while streaming is on.
+        """
+        got = False
+        pos, n = self._egram_pos, self._egram_len
+        while True:
+            try:
+                atr, vent = self._egram_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._egram_buf[0, pos] = atr
+            self._egram_buf[1, pos] = vent
+            pos = (pos + 1) % EGRAM_MAX_POINTS
+            n += 1
+            got = True
+        self._egram_pos, self._egram_len = pos, min(n, EGRAM_MAX_POINTS)
+
+        if got:
+            self._update_egram_plot()
+        self._egram_job = self.after(EGRAM_POLL_MS, self._drain_egram)
 
     def _update_egram_plot(self):
         """
         Refresh the egram plot with the latest atrial and ventricular data.
         """
-        if not self.atr_values:
+        pos, n = self._egram_pos, self._egram_len
+        if n == 0:
+            return
+        if n < EGRAM_MAX_POINTS:
+            atr_values, vent_values = self._egram_buf[:, :n]
+        else:
+            # full: unroll so the oldest sample is plotted first
+            atr_values, vent_values = np.concatenate(
+                (self._egram_buf[:, pos:], self._egram_buf[:, :pos]), axis=1
+            )
+        x = self._egram_x[:n]
+        self.line_atr.set_data(x, atr_values)
+        self.line_vent.set_data(x, vent_values)
+
+        xlim = (0, max(n, 10))
+        atr_ylim = egram_ylim(self.ax_atr.get_ylim(), atr_values.min(), atr_values.max())
+        vent_ylim = egram_ylim(self.ax_vent.get_ylim(), vent_values.min(), vent_values.max())
+
+        if (
+            self._egram_bg is None
+            or self.ax_atr.get_xlim() != xlim
+            or self.ax_atr.get_ylim() != atr_ylim
+            or self.ax_vent.get_ylim() != vent_ylim
+        ):
+            # axes changed: full redraw, which recaptures the background
+            self.ax_atr.set_xlim(*xlim)
+            self.ax_atr.set_ylim(*atr_ylim)
+            self.ax_vent.set_xlim(*xlim)
+            self.ax_vent.set_ylim(*vent_ylim)
+            self.canvas.draw_idle()
             return
-        x = list(range(len(self.atr_values)))
-        self.line_atr.set_data(x, self.atr_values)
-        self.line_vent.set_data(x, self.vent_values)
-
-        self.ax_atr.set_xlim(0, max(len(self.atr_values), 10))
-        min_a, max_a = min(self.atr_values), max(self.atr_values)
-        self.ax_atr.set_ylim(min_a - 0.1, max_a + 0.1)
 
-        self.ax_vent.set_xlim(0, max(len(self.vent_values), 10))
-        min_v, max_v = min(self.vent_values), max(self.vent_values)
-        self.ax_vent.set_ylim(min_v - 0.1, max_v + 0.1)
+        # only the traces moved: repaint them over the cached background
+        self.canvas.restore_region(self._egram_bg)
+        self.ax_atr.draw_artist(self.line_atr)
+        self.ax_vent.draw_artist(self.line_vent)
+        self.canvas.blit(self.fig.bbox)
 
-        self.canvas.draw_idle()
+    def _on_canvas_draw(self, event):
+        """
+        After every full redraw (limit change, resize), cache the static
+        background for blitting and paint the animated traces on top.
+        """
+        self._egram_bg = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax_atr.draw_artist(self.line_atr)
+        self.ax_vent.draw_artist(self.line_vent)
 
 
 if __name__ == "__main__":
+    # UART frame dumps are logged at DEBUG; lower the level to see them
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     App().mainloop()
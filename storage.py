@@ -1,49 +1,229 @@
 import os
 import json
+import hashlib
+import hmac
+import secrets
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is missing
+    orjson = None
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 USERS_JSON = os.path.join(DATA_DIR, "users.json")
 PARAMS_JSON = os.path.join(DATA_DIR, "params.json")
+USER_PARAMS_DIR = os.path.join(DATA_DIR, "user_params")
+# legacy single-file store, split into USER_PARAMS_DIR on first run
 USER_PARAMS_JSON = os.path.join(DATA_DIR, "user_params.json")
 
+# Parsed JSON reused until the file changes on disk (keyed by st_mtime_ns)
+_users_cache = {"mtime": None, "data": None, "index": {}}
+_user_params_cache = {}   # path -> (mtime, data)
+_user_params_written = {}  # path -> (mtime, digest) of the last bytes we wrote
+_cache_lock = threading.RLock()
+
+
+def _read_json(path):
+    # read raw bytes either way; json.loads detects UTF-8 itself
+    with open(path, "rb") as f:
+        buf = f.read()
+    if orjson is not None:
+        return orjson.loads(buf)
+    return json.loads(buf)
+
+
+def _encode_json(data):
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def _write_json(path, data):
+    """
+    Atomically replace `path` with `data`: the document is encoded up front,
+    written to a temp file in one call, fsynced, then renamed over `path`, so
+    a crash mid-save never leaves a truncated file behind.
+    """
+    _write_bytes(path, _encode_json(data))
+
+
+def _write_bytes(path, buf):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(buf)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
 
 def ensure_files():
     """Create data/ and tiny JSON files if missing."""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(USERS_JSON):
-        with open(USERS_JSON, "w") as f:
-            json.dump({"users": []}, f, indent=2)
+    os.makedirs(USER_PARAMS_DIR, exist_ok=True)   # also creates DATA_DIR
+    try:
+        load_users()   # stats users.json and primes the cache in one go
+    except FileNotFoundError:
+        save_users({"users": []})
+    try:
+        _migrate_user_params()
+    except FileNotFoundError:
+        pass
+
+
+def _migrate_user_params():
+    """
+    Split the legacy user_params.json into one file per user, then remove it.
+    Per-user files that already exist are left untouched.
+    """
+    legacy = _read_json(USER_PARAMS_JSON)
+    for name, modes in legacy.items():
+        if not os.path.exists(_user_params_path(name)):
+            save_user_params(name, modes)
+    os.remove(USER_PARAMS_JSON)
+
+
+def _refresh_users_cache(data, mtime):
+    _users_cache["data"] = data
+    _users_cache["mtime"] = mtime
+    _users_cache["index"] = {u["name"]: u for u in data["users"]}
+
+
+def hash_pw(pw, salt):
+    """
+    Hex scrypt digest of a password with the given salt (bytes).
+    """
+    return hashlib.scrypt(
+        pw.encode("utf-8"), salt=salt, n=16384, r=8, p=1, dklen=32
+    ).hex()
+
+
+def make_pw_record(pw):
+    """
+    Return the {"salt", "pw"} fields stored in users.json for a new password.
+    """
+    salt = secrets.token_bytes(16)
+    return {"salt": salt.hex(), "pw": hash_pw(pw, salt)}
+
+
+def check_pw(user, pw):
+    """
+    Return True if `pw` matches the stored record `user`.
+    """
+    candidate = hash_pw(pw, bytes.fromhex(user["salt"]))
+    return hmac.compare_digest(user["pw"], candidate)
 
 
 def load_users():
-    with open(USERS_JSON, "r") as f:
-        return json.load(f)
+    """
+    Return the parsed users.json, re-reading it only when its mtime changes.
+    Plaintext passwords left by older versions (records without a salt)
+    are hashed in place on load.
+    """
+    with _cache_lock:
+        mtime = os.stat(USERS_JSON).st_mtime_ns
+        if mtime != _users_cache["mtime"]:
+            data = _read_json(USERS_JSON)
+            legacy = [u for u in data["users"] if "salt" not in u]
+            if legacy:
+                for u in legacy:
+                    u.update(make_pw_record(u["pw"]))
+                save_users(data)
+            else:
+                _refresh_users_cache(data, mtime)
+        return _users_cache["data"]
+
+
+def load_user_index():
+    """
+    Return a {name: user record} index of registered users (kept in sync with
+    load_users). The records are the same dicts held in load_users()["users"].
+    """
+    with _cache_lock:
+        load_users()
+        return _users_cache["index"]
 
 
 def save_users(data):
-    with open(USERS_JSON, "w") as f:
-        json.dump(data, f, indent=2)
+    with _cache_lock:
+        _write_json(USERS_JSON, data)
+        _refresh_users_cache(data, os.stat(USERS_JSON).st_mtime_ns)
+
 
+def _user_params_path(name):
+    """
+    Per-user file named by the SHA-256 of the UTF-8 username: names that
+    differ only by case, or match Windows device names (CON, COM1, ...),
+    still get distinct, valid file names.
+    """
+    digest = hashlib.sha256(name.encode("utf-8")).hexdigest()
+    return os.path.join(USER_PARAMS_DIR, digest + ".json")
+
+
+def load_user_params(name):
+    """
+    Return {mode: {param: value}} saved for `name`, or {} if none saved yet.
+    The file is only re-parsed when its mtime changes.
+    """
+    path = _user_params_path(name)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    with _cache_lock:
+        cached = _user_params_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, _read_json(path))
+            _user_params_cache[path] = cached
+        return cached[1]
 
-def load_user_params():
-    if os.path.exists(USER_PARAMS_JSON):
-        with open(USER_PARAMS_JSON, "r") as f:
-            return json.load(f)
-    return {}
+
+def save_user_params(name, data):
+    """
+    Write `data` as the saved parameters for `name`. The write is skipped if
+    the file still holds exactly what the last save for it wrote.
+    """
+    path = _user_params_path(name)
+    buf = _encode_json(data)
+    digest = hashlib.blake2b(buf, digest_size=16).digest()
+    with _cache_lock:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime is None or _user_params_written.get(path) != (mtime, digest):
+            _write_bytes(path, buf)
+            mtime = os.stat(path).st_mtime_ns
+            _user_params_written[path] = (mtime, digest)
+        _user_params_cache[path] = (mtime, data)
 
 
-def save_user_params(data):
-    with open(USER_PARAMS_JSON, "w") as f:
-        json.dump(data, f, indent=2)
+def _expand_ranges(ranges):
+    """
+    Expand a list of {min, max, inc} ranges into the sorted list of every
+    value a slider may take.
+    """
+    vals = []
+    for r in ranges:
+        v = r["min"]
+        while v <= r["max"]:
+            vals.append(v)
+            v = round(v + r["inc"], 5)
+    return sorted(set(vals))
 
 
+@lru_cache(maxsize=1)
 def load_param_config():
     """
-    Load parameter schema, default values, and mode list from the JSON config.
+    Load parameter schema, default values, mode list, and the per-mode tuple of
+    parameter keys (in schema order) from the JSON config.
+    The result is parsed once per process and shared, so callers must treat it
+    as read-only; derived fields (bounds, allowed_vals, allowed_index) are
+    filled in here.
     """
-    with open(PARAMS_JSON, "r") as f:
-        cfg = json.load(f)
+    cfg = _read_json(PARAMS_JSON)
 
     schema_raw = cfg.get("schema", {})
     defaults = cfg.get("defaults", {})
@@ -51,10 +231,30 @@ def load_param_config():
 
     type_map = {"int": int, "float": float}
 
-    schema = {}
-    for key, meta in schema_raw.items():
-        m = dict(meta)
-        m["type"] = type_map.get(m.get("type", "int"), int)
-        schema[key] = m
+    # the parsed tree is ours alone, so fill in derived fields in place
+    for meta in schema_raw.values():
+        meta["type"] = type_map.get(meta.get("type", "int"), int)
+        if "ranges" in meta:
+            meta["bounds"] = tuple((r["min"], r["max"], r["inc"]) for r in meta["ranges"])
+            meta["allowed_vals"] = tuple(_expand_ranges(meta["ranges"]))
+            # value -> slider index; 60 and 60.0 hash alike, so entry text
+            # parsed with float() finds int-typed values too
+            meta["allowed_index"] = MappingProxyType(
+                {v: i for i, v in enumerate(meta["allowed_vals"])}
+            )
+
+    modes_index = {
+        m: tuple(k for k, meta in schema_raw.items() if m in meta.get("modes", []))
+        for m in modes
+    }
 
-    return schema, defaults, modes
+    # shared via lru_cache, so hand out read-only views
+    schema = MappingProxyType(
+        {key: MappingProxyType(meta) for key, meta in schema_raw.items()}
+    )
+    return (
+        schema,
+        MappingProxyType(defaults),
+        tuple(modes),
+        MappingProxyType(modes_index),
+    )
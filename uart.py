@@ -1,7 +1,11 @@
+import logging
+import sys
 import serial
 import struct
 import time
 
+log = logging.getLogger(__name__)
+
 # ---------------------------------------------------------------------
 # Global serial handle (shared with DCM)
 # ---------------------------------------------------------------------
@@ -23,10 +27,64 @@ FRAME_LEN   = 105       # total RX frame
 PARAM_LEN   = 89        # echo parameter region
 EGRAM_LEN   = 16        # 2 doubles (ATR, VENT)
 
+RX_TIMEOUT            = 0.2     # s, overall deadline per RX frame
 SLEEP_BETWEEN_SAMPLES = 0.005
+# RECV_ONLY requests pipelined per write while streaming, amortizing
+# USB-serial transfer latency over several samples (~9 ms per frame at
+# 115200 baud; the read deadline scales with the batch). Kept at 1 until
+# the firmware is confirmed to answer back-to-back queued requests.
+RECV_BATCH            = 1
 PRINT_EVERY           = 10
 
 
+def _round_int(x):
+    return int(round(x))
+
+
+# (GUI param key, fallback, wire encoder) for every DCM-supplied field of the
+# SET_PARAM frame; the encoder turns the GUI value into what is packed
+SET_PARAM_FIELDS = (
+    ("LRL_ppm",                 60,  int),          # ppm
+    ("URL_ppm",                 120, int),          # ppm
+    ("Pace_Atrial_Amp_V",       3.5, float),        # V
+    ("Atrial_PW_ms",            1.0, _round_int),   # ms
+    ("ARP_ms",                  250, _round_int),   # ms
+    ("Sense_Atrial_Amp_V",      3.5, float),        # V, used as a_SenseAmp
+    ("Pace_Ventricular_Amp_V",  3.5, float),        # V
+    ("Ventricular_PW_ms",       1.0, _round_int),   # ms
+    ("VRP_ms",                  320, _round_int),   # ms
+    ("Sense_Ventricular_Amp_V", 3.5, float),        # V
+    ("Reaction Time",           30,  int),          # s
+    ("Response Factor",         8,   int),          # unitless
+    ("Recovery Time",           5,   int),          # min
+)
+
+# The Walk/Jog/Run thresholds, MSRs and hysteresis are internal defaults for now
+WALK_THRESH, JOG_THRESH, RUN_THRESH = 0.5, 1.75, 3.0
+WALK_MSR,    JOG_MSR,    RUN_MSR    = 90, 110, 130
+WALK_HYS,    JOG_HYS,    RUN_HYS    = 0.5, 1.75, 2.75
+
+
+# Wire layout of the 91-byte SET_PARAM frame (see build_set_param_frame)
+_SET_FRAME = struct.Struct(
+    "<BBB"   # Rx(1:3)    CMD, SUBCMD, MODE
+    "HH"     # Rx(4:7)    LRL, URL
+    "fHHf"   # Rx(8:19)   a_PaceAmp, a_PulseWidth, ARP, a_SenseAmp
+    "fHHf"   # Rx(20:31)  v_PaceAmp, v_PulseWidth, VRP, v_SenseAmp
+    "HH"     # Rx(32:35)  Reaction_Time, Response_Factor
+    "ddd"    # Rx(36:59)  Walk/Jog/Run_Thresh
+    "HHHH"   # Rx(60:67)  Recovery_Time, Walk/Jog/Run_MSR
+    "ddd"    # Rx(68:91)  Walk/Jog/Run_Hys
+)
+assert _SET_FRAME.size == 91, f"SET frame length is {_SET_FRAME.size}, expected 91"
+
+_RECV_FRAME = bytes((CMD_PARAM, SUBCMD_RECV_ONLY)) + bytes(89)
+
+# Egram region of an RX frame: ATR, VENT as little-endian doubles
+_EGRAM = struct.Struct("<dd")
+assert _EGRAM.size == EGRAM_LEN
+
+
 # ---------------------------------------------------------------------
 # Init
 # ---------------------------------------------------------------------
@@ -51,52 +109,77 @@ def init_uart(port="COM10", baudrate=115200, timeout=0.05):
     ser.reset_input_buffer()
     ser.reset_output_buffer()
 
-    print(f"UART initialized on {ser.port} at {baudrate} baud.")
+    log.info("UART initialized on %s at %d baud.", ser.port, baudrate)
     return ser
 
 
+def close_uart():
+    """
+    Close the shared UART port, if open. Safe to call more than once.
+    """
+    global ser
+    if ser is not None and ser.is_open:
+        ser.close()
+    ser = None
+
+
 # ---------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------
-def hex_dump(b: bytes) -> str:
-    return " ".join(f"{x:02X}" for x in b)
-
-
 def _ensure_ser():
     if ser is None:
         raise RuntimeError("UART not initialized. Call init_uart() first.")
 
 
-def _read_one_frame() -> bytes:
+def _read_upto(count: int = 1) -> bytes:
     """
-    Read exactly one 105-byte frame from `ser`, or raise RuntimeError.
+    Read up to `count` back-to-back 105-byte frames from `ser`; the result is
+    short if the device went quiet or the deadline passed.
     """
     _ensure_ser()
-    rx = b""
-    t0 = time.time()
-    while len(rx) < FRAME_LEN and time.time() - t0 < 0.2:
-        chunk = ser.read(FRAME_LEN - len(rx))
-        if not chunk:
-            break
-        rx += chunk
-
-    if len(rx) < FRAME_LEN:
+    want = FRAME_LEN * count
+    # Each read(n) waits up to the port timeout for the missing bytes, so a
+    # frame normally arrives in one call; a read returning nothing means the
+    # device went quiet for a whole timeout, and we give up early. The
+    # deadline is taken before the first read so it bounds the whole call.
+    _now = time.monotonic    # local alias for the top-up loop
+    deadline = _now() + RX_TIMEOUT * count
+    rx = ser.read(want)
+    if len(rx) < want:
+        # rare top-up path: grow a bytearray instead of re-copying bytes
+        buf = bytearray(rx)
+        while len(buf) < want and _now() < deadline:
+            chunk = ser.read(want - len(buf))
+            if not chunk:
+                break
+            buf += chunk
+        rx = bytes(buf)
+    return rx
+
+
+def _read_frames(count: int = 1) -> bytes:
+    """
+    Read exactly `count` back-to-back 105-byte frames from `ser`, or raise
+    RuntimeError.
+    """
+    want = FRAME_LEN * count
+    rx = _read_upto(count)
+    if len(rx) < want:
         raise RuntimeError(
-            f"RX too short: got {len(rx)} bytes, expected {FRAME_LEN}. "
+            f"RX too short: got {len(rx)} bytes, expected {want}. "
             f"Raw: {rx.hex(' ')}"
         )
 
-    return rx[:FRAME_LEN]
+    return rx
 
 
-def _decode_frame(frame: bytes):
+def _decode_frame(frame: bytes, offset: int = 0):
     """
-    Given a 105-byte frame, return (params_echo, atr, vent).
+    Given a buffer holding a 105-byte frame at `offset`, return
+    (params_echo, atr, vent).
     """
-    params_echo = frame[:PARAM_LEN]
-    egram_bytes = frame[PARAM_LEN:PARAM_LEN + EGRAM_LEN]
-    atr, vent = struct.unpack("<dd", egram_bytes)
-    return params_echo, atr, vent
+    atr, vent = _EGRAM.unpack_from(frame, offset + PARAM_LEN)
+    return frame[offset:offset + PARAM_LEN], atr, vent
 
 
 def _get_val(params: dict | None, key: str, default):
@@ -157,82 +240,23 @@ def build_set_param_frame(params: dict | None, mode_code: int = 1) -> bytes:
     MODE = int(mode_code) & 0xFF
 
     # ---- drawn from DCM JSON params ----
-    # heart rates (ppm)
-    LRL_ppm = _get_val(params, "LRL_ppm", 60)
-    URL_ppm = _get_val(params, "URL_ppm", 120)
-
-    # atrial side
-    a_PaceAmp_V  = _get_val(params, "Pace_Atrial_Amp_V", 3.5)      # V
-    a_PW_ms      = _get_val(params, "Atrial_PW_ms", 1.0)           # ms
-    ARP_ms       = _get_val(params, "ARP_ms", 250)                 # ms
-    a_SenseAmp_V = _get_val(params, "Sense_Atrial_Amp_V", 3.5)     # V, used as a_SenseAmp
-
-    # ventricular side
-    v_PaceAmp_V  = _get_val(params, "Pace_Ventricular_Amp_V", 3.5) # V
-    v_PW_ms      = _get_val(params, "Ventricular_PW_ms", 1.0)      # ms
-    VRP_ms       = _get_val(params, "VRP_ms", 320)                 # ms
-    v_SenseAmp_V = _get_val(params, "Sense_Ventricular_Amp_V", 3.5)# V
-
-    # rate response
-    Reaction_Time   = _get_val(params, "Reaction Time", 30)        # s
-    Response_Factor = _get_val(params, "Response Factor", 8)       # unitless
-    Recovery_Time   = _get_val(params, "Recovery Time", 5)         # min
-
-    # The Walk/Jog/Run thresholds and hysteresis we keep as internal defaults for now
-    Walk_Thresh = 0.5
-    Jog_Thresh  = 1.75
-    Run_Thresh  = 3.0
-
-    Walk_MSR = 90
-    Jog_MSR  = 110
-    Run_MSR  = 130
-
-    Walk_Hys = 0.5
-    Jog_Hys  = 1.75
-    Run_Hys  = 2.75
-
-    # ---- pack into bytes ----
-    frame = bytearray()
-
-    # CMD and SUBCMD
-    frame.append(CMD_PARAM)        # Rx(1)
-    frame.append(SUBCMD_SET_PAR)   # Rx(2)
-
-    # mode and main rates
-    frame.extend(struct.pack("<B", MODE))         # Rx(3)
-    frame.extend(struct.pack("<H", LRL_ppm))      # Rx(4:5)
-    frame.extend(struct.pack("<H", URL_ppm))      # Rx(6:7)
-
-    # pacing and sensing first
-    frame.extend(struct.pack("<f", a_PaceAmp_V))                # Rx(8:11)
-    frame.extend(struct.pack("<H", int(round(a_PW_ms))))        # Rx(12:13)
-    frame.extend(struct.pack("<H", int(round(ARP_ms))))         # Rx(14:15)
-    frame.extend(struct.pack("<f", a_SenseAmp_V))               # Rx(16:19)
-
-    frame.extend(struct.pack("<f", v_PaceAmp_V))                # Rx(20:23)
-    frame.extend(struct.pack("<H", int(round(v_PW_ms))))        # Rx(24:25)
-    frame.extend(struct.pack("<H", int(round(VRP_ms))))         # Rx(26:27)
-    frame.extend(struct.pack("<f", v_SenseAmp_V))               # Rx(28:31)
-
-    # rate response bloc
-    frame.extend(struct.pack("<H", int(Reaction_Time)))         # Rx(32:33)
-    frame.extend(struct.pack("<H", int(Response_Factor)))       # Rx(34:35)
-
-    frame.extend(struct.pack("<d", Walk_Thresh))                # Rx(36:43)
-    frame.extend(struct.pack("<d", Jog_Thresh))                 # Rx(44:51)
-    frame.extend(struct.pack("<d", Run_Thresh))                 # Rx(52:59)
-
-    frame.extend(struct.pack("<H", int(Recovery_Time)))         # Rx(60:61)
-    frame.extend(struct.pack("<H", int(Walk_MSR)))              # Rx(62:63)
-    frame.extend(struct.pack("<H", int(Jog_MSR)))               # Rx(64:65)
-    frame.extend(struct.pack("<H", int(Run_MSR)))               # Rx(66:67)
-
-    frame.extend(struct.pack("<d", Walk_Hys))                   # Rx(68:75)
-    frame.extend(struct.pack("<d", Jog_Hys))                    # Rx(76:83)
-    frame.extend(struct.pack("<d", Run_Hys))                    # Rx(84:91)
-
-    assert len(frame) == 91, f"SET frame length is {len(frame)}, expected 91"
-    return bytes(frame)
+    v = {
+        key: encode(_get_val(params, key, default))
+        for key, default, encode in SET_PARAM_FIELDS
+    }
+
+    return _SET_FRAME.pack(
+        CMD_PARAM, SUBCMD_SET_PAR, MODE,                      # Rx(1:3)
+        v["LRL_ppm"], v["URL_ppm"],                           # Rx(4:7)
+        v["Pace_Atrial_Amp_V"], v["Atrial_PW_ms"],            # Rx(8:13)
+        v["ARP_ms"], v["Sense_Atrial_Amp_V"],                 # Rx(14:19)
+        v["Pace_Ventricular_Amp_V"], v["Ventricular_PW_ms"],  # Rx(20:25)
+        v["VRP_ms"], v["Sense_Ventricular_Amp_V"],            # Rx(26:31)
+        v["Reaction Time"], v["Response Factor"],             # Rx(32:35)
+        WALK_THRESH, JOG_THRESH, RUN_THRESH,                  # Rx(36:59)
+        v["Recovery Time"], WALK_MSR, JOG_MSR, RUN_MSR,       # Rx(60:67)
+        WALK_HYS, JOG_HYS, RUN_HYS,                           # Rx(68:91)
+    )
 
 
 def build_recv_only_frame() -> bytes:
@@ -241,46 +265,51 @@ def build_recv_only_frame() -> bytes:
       Rx(1) = 0x00 (CMD_PARAM)
       Rx(2) = 0x01 (READ / EGRAM ONLY)
       Remaining 89 bytes = 0 (ignored for params).
+    The frame never changes, so it is built once at import.
     """
-    frame = bytearray()
-    frame.append(CMD_PARAM)
-    frame.append(SUBCMD_RECV_ONLY)
-    frame.extend([0x00] * 89)
-    assert len(frame) == 91, f"RECV frame length is {len(frame)}, expected 91"
-    return bytes(frame)
+    return _RECV_FRAME
 
 
-# ---------------------------------------------------------------------
-# 1) Send SET once and print echo
-# ---------------------------------------------------------------------
-def uart_send_set_params(params: dict, mode_code: int):
+def _exchange_once(tx_frame: bytes, name: str, tag: str):
     """
-    Send SET_PARAM frame once, built from GUI `params` + `mode_code`,
-    then read and print the echo plus one egram sample to the terminal.
+    Write one request frame, then read and print the echo plus one egram
+    sample to the terminal. Shared by the one-shot SET and RECV commands.
     """
     _ensure_ser()
-    set_frame = build_set_param_frame(params, mode_code)
 
     ser.reset_input_buffer()
     ser.reset_output_buffer()
 
-    print("TX: SET_PARAM (00 00 ...) frame:")
-    print(hex_dump(set_frame))
-    ser.write(set_frame)
+    # frame dumps are debug output; skip building the hex strings otherwise
+    debug = log.isEnabledFor(logging.DEBUG)
+    if debug:
+        log.debug("TX: %s (%s ...) frame:\n%s", name, tag, tx_frame.hex(" ").upper())
+    ser.write(tx_frame)
     ser.flush()
 
     try:
-        frame = _read_one_frame()
+        frame = _read_frames()
     except RuntimeError as e:
-        print(f"RX error after SET_PARAM: {e}")
+        log.warning("RX error after %s: %s", name, e)
         return
 
     params_echo, atr, vent = _decode_frame(frame)
 
-    print("RX echo bytes (89):")
-    print(hex_dump(params_echo))
-    print(f"Atrium Egram sample:    {atr:.6f}")
-    print(f"Ventricle Egram sample: {vent:.6f}")
+    if debug:
+        log.debug("RX echo bytes (89):\n%s", params_echo.hex(" ").upper())
+    log.info("Atrium Egram sample:    %.6f", atr)
+    log.info("Ventricle Egram sample: %.6f", vent)
+
+
+# ---------------------------------------------------------------------
+# 1) Send SET once and print echo
+# ---------------------------------------------------------------------
+def uart_send_set_params(params: dict, mode_code: int):
+    """
+    Send SET_PARAM frame once, built from GUI `params` + `mode_code`,
+    then read and print the echo plus one egram sample to the terminal.
+    """
+    _exchange_once(build_set_param_frame(params, mode_code), "SET_PARAM", "00 00")
 
 
 # ---------------------------------------------------------------------
@@ -291,29 +320,7 @@ def uart_send_recv_only():
     Send RECV_ONLY frame once, then read and print the echo plus one
     egram sample to the terminal.
     """
-    _ensure_ser()
-    recv_frame = build_recv_only_frame()
-
-    ser.reset_input_buffer()
-    ser.reset_output_buffer()
-
-    print("TX: RECV_ONLY (00 01 ...) frame:")
-    print(hex_dump(recv_frame))
-    ser.write(recv_frame)
-    ser.flush()
-
-    try:
-        frame = _read_one_frame()
-    except RuntimeError as e:
-        print(f"RX error after RECV_ONLY: {e}")
-        return
-
-    params_echo, atr, vent = _decode_frame(frame)
-
-    print("RX echo bytes (89):")
-    print(hex_dump(params_echo))
-    print(f"Atrium Egram sample:    {atr:.6f}")
-    print(f"Ventricle Egram sample: {vent:.6f}")
+    _exchange_once(build_recv_only_frame(), "RECV_ONLY", "00 01")
 
 
 # ---------------------------------------------------------------------
@@ -324,8 +331,9 @@ def stream_egram(callback, params: dict | None, mode_code: int = 1):
     Continuous egram stream.
 
     - Builds SET_PARAM from `params` + `mode_code` and sends it once.
-    - Then repeatedly sends RECV_ONLY, reads one frame,
-      decodes egram and calls `callback(atr, vent, params_echo, sample_idx)`.
+    - Then repeatedly sends RECV_BATCH RECV_ONLY frames, reads the replies,
+      decodes egram and calls `callback(atr, vent, params_echo, sample_idx)`
+      for each.
 
     This is designed to run in a background thread.
     """
@@ -334,61 +342,69 @@ def stream_egram(callback, params: dict | None, mode_code: int = 1):
     _ensure_ser()
 
     if _stream_running:
-        print("Egram stream already running.")
+        log.warning("Egram stream already running.")
         return
 
     _stream_stop_requested = False    # request flag
     _stream_running = True
 
     set_frame  = build_set_param_frame(params, mode_code)
-    recv_frame = build_recv_only_frame()
+    recv_batch = build_recv_only_frame() * RECV_BATCH
 
     ser.reset_input_buffer()
     ser.reset_output_buffer()
-    print("Streaming: sending initial SET_PARAM (00 00 ...)")
-    print(hex_dump(set_frame))
+    log.info("Streaming: sending initial SET_PARAM (00 00 ...)")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("%s", set_frame.hex(" ").upper())
     ser.write(set_frame)
     ser.flush()
 
     # read initial echo
     try:
-        _ = _read_one_frame()
+        _ = _read_frames()
     except RuntimeError as e:
-        print(f"Initial frame after SET failed: {e}")
+        log.warning("Initial frame after SET failed: %s", e)
 
-    print("Streaming with RECV_ONLY (00 01 ...). Call stop_stream() to stop.")
+    log.info("Streaming with RECV_ONLY (00 01 ...). Call stop_stream() to stop.")
 
     sample_idx = 0
+    debug = log.isEnabledFor(logging.DEBUG)   # checked once, not per sample
 
     try:
         while not _stream_stop_requested:
-            ser.write(recv_frame)
-            ser.flush()
+            # no flush(): the read below waits for the reply anyway, and
+            # write_timeout still bounds a stalled write
+            ser.write(recv_batch)
 
-            try:
-                frame = _read_one_frame()
-            except RuntimeError:
-                sample_idx += 1
-                time.sleep(SLEEP_BETWEEN_SAMPLES)
-                continue
+            rx = _read_upto(RECV_BATCH)
+            whole = len(rx) - len(rx) % FRAME_LEN
 
-            params_echo, atr, vent = _decode_frame(frame)
+            for offset in range(0, whole, FRAME_LEN):
+                params_echo, atr, vent = _decode_frame(rx, offset)
 
-            if callback is not None:
-                try:
-                    callback(atr, vent, params_echo, sample_idx)
-                except Exception as cb_e:
-                    print(f"Callback error: {cb_e}")
+                if callback is not None:
+                    try:
+                        callback(atr, vent, params_echo, sample_idx)
+                    except Exception as cb_e:
+                        log.warning("Callback error: %s", cb_e)
 
-            if sample_idx % PRINT_EVERY == 0:
-                print(f"[{sample_idx}] Atr={atr:.6f} Vent={vent:.6f}")
+                if debug and sample_idx % PRINT_EVERY == 0:
+                    log.debug("[%d] Atr=%.6f Vent=%.6f", sample_idx, atr, vent)
+
+                sample_idx += 1
 
-            sample_idx += 1
+            if whole < FRAME_LEN * RECV_BATCH:
+                # short read: the frames above decoded fine; wait out any
+                # late replies still in flight, then drop them so they can't
+                # shift the frame boundaries of the next batch
+                time.sleep(RX_TIMEOUT)
+                ser.reset_input_buffer()
+                sample_idx += RECV_BATCH - whole // FRAME_LEN
             time.sleep(SLEEP_BETWEEN_SAMPLES)
     finally:
         _stream_running = False
         _stream_stop_requested = False
-        print("Egram stream stopped.")
+        log.info("Egram stream stopped.")
 
 
 def stop_stream():
@@ -400,7 +416,8 @@ def stop_stream():
 
 
 if __name__ == "__main__":
-    # Simple manual test with default params
+    # Simple manual test with default params, showing the frame dumps
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s", stream=sys.stdout)
     init_uart("COM10", 115200)
     uart_send_set_params(params=None, mode_code=1)
     uart_send_recv_only()